@@ -5,6 +5,7 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 from src.web_api import WebApiController
 from src.experiment_config import ExperimentConfig
+from src.run_file import RUN_DATA_SUFFIXES, RUN_SAMPLES_SUFFIX, load_run, metadata_filename_for
 from flask import send_from_directory
 import csv
 import json
@@ -24,7 +25,7 @@ def list_csv_files():
         files = [
             f
             for f in os.listdir(data_dir)
-            if f.endswith(".csv") and os.path.isfile(os.path.join(data_dir, f))
+            if f.endswith(RUN_DATA_SUFFIXES) and os.path.isfile(os.path.join(data_dir, f))
         ]
 
         # Sort files by modification time (newest first)
@@ -57,6 +58,9 @@ def load_csv(filename):
     if not os.path.exists(filepath):
         return jsonify({"error": "File not found"}), 404
 
+    if filename.endswith(RUN_SAMPLES_SUFFIX):
+        return load_binary_run(filepath)
+
     time_data = []
     signal_data = []
     try:
@@ -70,10 +74,32 @@ def load_csv(filename):
 
     return jsonify({"time": time_data, "signal": signal_data})
 
+def load_binary_run(filepath):
+    """
+    Serve a memory-mapped .npy run. Optional query arguments select a window on the
+    time axis (start, stop in seconds) and cap the number of points returned (max_points),
+    so only the pages of that window are read from disk.
+    """
+    try:
+        run = load_run(filepath)
+        start = request.args.get("start", type=float)
+        stop = request.args.get("stop", type=float)
+        max_points = request.args.get("max_points", type=int)
+
+        first = 0 if start is None else run.index_at(start)
+        last = len(run) if stop is None else run.index_at(stop)
+        step = max(1, -(-(last - first) // max_points)) if max_points else 1
+        times, samples = run.window(start, stop, step)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({"time": times.tolist(), "signal": samples.tolist()})
+
+
 @app.route("/load_metadata/<filename>")
 def load_metadata(filename):
     """Load metadata and return a prettified human-readable string via ExperimentConfig."""
-    metadata_filename = filename.replace(".csv", "_metadata.json")
+    metadata_filename = metadata_filename_for(filename)
     filepath = os.path.join(app.config["DATA_DIR"], metadata_filename)
     print(f"Loading metadata from {filepath}")
 
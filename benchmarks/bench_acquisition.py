@@ -0,0 +1,93 @@
+# benchmarks/bench_acquisition.py
+# Throughput and jitter of the acquisition loop against the DWF emulator.
+# Runs the full production protocol (Recorder + TimedActionFactory + save path) without hardware.
+#
+#   python -m benchmarks.bench_acquisition --hz 1000000 --duration 2 --runs 5
+
+import argparse
+import os
+import re
+import tempfile
+import time
+import numpy as np
+
+from src.dwf_emulator import DwfEmulator
+from src.experiment_config import ExperimentConfig
+from src.io_controller import IOController
+from src.protocol_runner import ProtocolRunner
+from src.recorder import Recorder
+
+LATENCY_PATTERN = re.compile(r"action_(\w+)_executed .*latency=([-\d.]+)s")
+
+
+def run_once(hz: int, duration_s: float, call_latency_s: float, out_dir: str, raw: bool = False):
+    emulator = DwfEmulator(call_latency_s=call_latency_s, record_calls=True)
+    io = IOController(backend=emulator)
+    io.open_device()
+
+    cfg = ExperimentConfig(
+        recording_hz=hz,
+        ared_duration_s=duration_s / 2,
+        wait_after_ared_s=0.002,
+        agreen_delay_s=0.002,
+        agreen_duration_s=duration_s / 2,
+        filename=os.path.join(out_dir, "bench.csv"),
+        raw_adc=raw,
+    )
+
+    t_start = time.perf_counter()
+    ProtocolRunner(io, Recorder(io)).run_protocol(cfg)
+    wall_s = time.perf_counter() - t_start
+
+    events = cfg.event_logger.get_events()
+    acquired = next(int(l.split("_")[1]) for _, l in events if l.startswith("acquired_"))
+    recording_s = cfg.event_logger.get_event_time("recording_completed") - next(
+        t for t, l in events if l.startswith("recording_loop_started")
+    )
+    save_s = cfg.event_logger.get_event_time("protocol_complete")
+    save_s = wall_s - save_s if save_s is not None else float("nan")
+
+    polls = np.diff(np.asarray(emulator.status_call_times))
+    latencies = {m.group(1): float(m.group(2)) for _, l in events if (m := LATENCY_PATTERN.search(l))}
+
+    return {
+        "acquired": acquired,
+        "recording_s": recording_s,
+        "save_s": save_s,
+        "throughput": acquired / recording_s,
+        "poll_p50_us": np.percentile(polls, 50) * 1e6,
+        "poll_p99_us": np.percentile(polls, 99) * 1e6,
+        "poll_max_us": polls.max() * 1e6,
+        "latencies": latencies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acquisition loop benchmark on the DWF emulator")
+    parser.add_argument("--hz", type=int, default=100000)
+    parser.add_argument("--duration", type=float, default=1.0, help="protocol length in seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--call-latency", type=float, default=0.0, help="emulated per-call USB latency (s)")
+    parser.add_argument("--raw", action="store_true", help="record int16 ADC counts instead of float64 volts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        results = [run_once(args.hz, args.duration, args.call_latency, out_dir, args.raw) for _ in range(args.runs)]
+
+    print(f"\n--- Acquisition benchmark: {args.hz:,} Hz, {args.duration:.2f} s, {args.runs} runs ---")
+    print(f"{'run':>4} {'samples':>10} {'MS/s':>8} {'save s':>8} {'poll p50':>10} {'poll p99':>10} {'poll max':>10}")
+    for i, r in enumerate(results):
+        print(
+            f"{i:>4} {r['acquired']:>10} {r['throughput'] / 1e6:>8.3f} {r['save_s']:>8.3f} "
+            f"{r['poll_p50_us']:>8.1f}us {r['poll_p99_us']:>8.1f}us {r['poll_max_us']:>8.1f}us"
+        )
+
+    labels = sorted({label for r in results for label in r["latencies"]})
+    print("\nAction latency (mean ± std over runs):")
+    for label in labels:
+        values = np.array([r["latencies"][label] for r in results if label in r["latencies"]]) * 1e3
+        print(f"  {label:<16} {values.mean():+8.3f} ms ± {values.std():.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# benchmarks/bench_csv_writer.py
+# Time to save a run with the vectorized CSV writer.
+#
+#   python -m benchmarks.bench_csv_writer --samples 10000000 --hz 1000000
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+from src.csv_writer import write_signal_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV writer benchmark")
+    parser.add_argument("--samples", type=int, default=10_000_000)
+    parser.add_argument("--hz", type=int, default=1_000_000)
+    parser.add_argument("--signal-precision", type=int, default=6)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = np.random.default_rng(0).normal(0.2, 0.1, args.samples)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        filename = os.path.join(out_dir, "bench.csv")
+        for run in range(args.runs):
+            t_start = time.perf_counter()
+            write_signal_csv(filename, samples, args.hz, signal_precision=args.signal_precision)
+            elapsed = time.perf_counter() - t_start
+            size_mb = os.path.getsize(filename) / 1e6
+            print(
+                f"run {run}: {args.samples:,} rows in {elapsed:.3f} s "
+                f"({args.samples / elapsed / 1e6:.1f} M rows/s, {size_mb:.0f} MB)"
+            )
+
+
+if __name__ == "__main__":
+    main()
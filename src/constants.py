@@ -22,12 +22,26 @@ LED_GREEN_PIN = 1
 ANALOG_IN_CHANNEL = 0
 ANALOG_TRIGGER_STATE = 0
 ANALOG_RECORD_FOREVER = -1
+ADC_FULL_SCALE_COUNTS = 65536  # raw 16-bit samples span the channel range: volts = counts * range / 65536 + offset
 DELAY_BEFORE_RECORDING_START = -0.065 # seconds, delay before recording starts
+# threaded recording: the scheduler sleeps in steps of this while no action is due,
+# and the interpreter switches threads at least this often so the drain keeps polling
+SCHEDULER_IDLE_SLEEP_S = 0.0005
+RECORDING_SWITCH_INTERVAL_S = 0.0002
+# ring buffer between the drain loop and the sample consumers; it must hold a full device chunk
+RECORDER_RING_SECONDS = 1.0
+RECORDER_RING_MIN_SAMPLES = 1 << 16
 END_RECORDING_OFFSET_DELAY = 0.025 # small delay added to ensure the green LED is off first, as it was being skipped
 
 # for error message retrieval from C API
 STRING_BUFFER_SIZE = 524 
 
+# DWF backend selection for IOController.open_device()
+# "hardware" loads the WaveForms SDK library, "emulator" uses the in-process DwfEmulator
+DWF_BACKEND_HARDWARE = "hardware"
+DWF_BACKEND_EMULATOR = "emulator"
+DWF_BACKEND_ENV_VAR = "FLUORINDUC_DWF_BACKEND"
+
 # define the minimum and maximum voltage ranges when setting intensities for the LEDs
 # This will constrain the min and max current that can be set.
 LED_VOLTAGE_RANGES = {
@@ -43,3 +57,22 @@ ANALOG_OUT_WAIT = 0.0
 
 # Pre-buffer time before the first action is recorded
 PRE_BUFFER_SECONDS = 0.1
+
+# Run file formats written by ProtocolRunner: text CSV, binary .npy (memory-mappable), or both
+SAVE_FORMAT_CSV = "csv"
+SAVE_FORMAT_NPY = "npy"
+SAVE_FORMAT_BOTH = "both"
+SAVE_FORMATS = (SAVE_FORMAT_CSV, SAVE_FORMAT_NPY, SAVE_FORMAT_BOTH)
+
+# Streaming recordings (stream_to_disk): samples are appended to the .npy file in chunks of
+# at most STREAM_CHUNK_SAMPLES, and the file is synced to disk every STREAM_FSYNC_INTERVAL_S
+STREAM_CHUNK_SAMPLES = 1 << 18
+STREAM_FSYNC_INTERVAL_S = 1.0
+STREAM_IDLE_SLEEP_S = 0.005
+PHASE_MAX_S = 10.0  # longest protocol phase held in memory
+STREAM_PHASE_MAX_S = 24 * 3600.0  # longest protocol phase when streaming to disk
+
+# CSV output: decimals written per column, and rows formatted per chunk
+CSV_TIME_PRECISION = 9  # ns resolution, the most the time column ever needs
+CSV_SIGNAL_PRECISION = 6  # µV resolution, finer than the 14-bit ADC step
+CSV_CHUNK_ROWS = 1 << 14  # small enough to stay in the CPU cache
@@ -0,0 +1,179 @@
+# csv_writer.py
+# Vectorized CSV writer for recorded runs. The time and signal columns are formatted
+# as fixed-point text entirely in numpy (digits are computed with integer arithmetic
+# into a uint8 character matrix) and written in large chunks, so saving a run costs
+# a small fraction of the recording time. The output keeps the "time,signal" layout
+# read by /load_csv and the analysis notebooks.
+
+import numpy as np
+from src.constants import CSV_CHUNK_ROWS, CSV_TIME_PRECISION, CSV_SIGNAL_PRECISION
+
+_ZERO = ord("0")
+_MAX_PRECISION = 9  # fractional digits must fit in uint32
+_MAX_INTEGER = float(2**32 - 1)
+
+class _FixedColumn:
+    """Digits of one column rendered as fixed-point text, ready to be placed in a row matrix."""
+
+    def __init__(self, values: np.ndarray, precision: int):
+        if not 0 <= precision <= _MAX_PRECISION:
+            raise ValueError(f"precision must be between 0 and {_MAX_PRECISION}, got {precision}")
+        self.precision = precision
+        scale = 10**precision
+
+        magnitude = np.abs(values)
+        # NaN/inf and values that do not fit the integer path are rendered with repr()
+        self.special = ~(magnitude < _MAX_INTEGER)
+        if self.special.any():
+            magnitude = np.where(self.special, 0.0, magnitude)
+
+        int_part = magnitude.astype(np.uint32)  # truncation
+        frac = np.rint((magnitude - int_part) * scale).astype(np.uint32)
+        carry = frac >= scale  # rounding up to the next integer
+        if carry.any():
+            int_part = int_part + carry
+            frac = np.where(carry, 0, frac).astype(np.uint32)
+        self.int_part = int_part
+        self.frac = frac
+        self.negative = (values < 0) & ((int_part | frac) != 0)
+
+        self.n_int = len(str(int(int_part.max()))) if len(values) else 1
+        self.has_sign = bool(self.negative.any())
+        self.width = int(self.has_sign) + self.n_int + (precision + 1 if precision > 0 else 0)
+        self.special_text = [repr(float(v)).encode() for v in values[self.special]]
+
+    def place(self, chars: np.ndarray, keep: np.ndarray, col: int) -> bool:
+        """
+        Write the column into columns [col, col + width) of the (n, width) matrices.
+        Returns True if some cells were masked out (a sign or leading zeros on some rows).
+        """
+        masked = False
+        if self.has_sign:
+            chars[:, col] = ord("-")
+            keep[:, col] = self.negative
+            masked = True
+            col += 1
+
+        # integer digits, least significant first; leading zeros are masked out
+        remaining = self.int_part
+        for k in range(self.n_int - 1, -1, -1):
+            quotient = remaining // 10
+            chars[:, col + k] = remaining - quotient * 10 + _ZERO
+            if k < self.n_int - 1 and self.int_part.min() < 10 ** (self.n_int - 1 - k):
+                keep[:, col + k] = remaining != 0
+                masked = True
+            remaining = quotient
+        col += self.n_int
+
+        if self.precision > 0:
+            chars[:, col] = ord(".")
+            remaining = self.frac
+            for k in range(self.precision, 0, -1):
+                quotient = remaining // 10
+                chars[:, col + k] = remaining - quotient * 10 + _ZERO
+                remaining = quotient
+        return masked
+
+    def place_special(self, chars: np.ndarray, keep: np.ndarray, col: int):
+        """Overwrite the special rows with their repr() text."""
+        for row, text in zip(np.flatnonzero(self.special), self.special_text):
+            keep[row, col : col + self.width] = False
+            chars[row, col : col + len(text)] = np.frombuffer(text, dtype=np.uint8)
+            keep[row, col : col + len(text)] = True
+
+
+def format_rows(columns, precisions, scratch: dict = None) -> np.ndarray:
+    """
+    Format equally long numeric columns as comma separated, newline terminated rows.
+
+    Each column is rendered as fixed-point text with the matching number of decimals.
+    The characters are built in an (n_rows, width) uint8 matrix together with a mask
+    of the cells in use (signs and leading zeros vary per row), then gathered into a
+    flat uint8 array that can be written to a binary file as is.
+
+    :param scratch: Optional dict reused across calls to keep the matrices allocated,
+        which matters when formatting many chunks in a row.
+    """
+    fixed = []
+    for values, precision in zip(columns, precisions):
+        column = _FixedColumn(np.asarray(values, dtype=np.float64), precision)
+        fixed.append(column)
+
+    n = len(fixed[0].int_part)
+    # a special value may need more room than the fixed-point text
+    widths = [max([c.width] + [len(t) for t in c.special_text]) for c in fixed]
+    shape = (n, sum(widths) + len(fixed))
+    scratch = {} if scratch is None else scratch
+    if "chars" not in scratch or scratch["size"] < shape[0] * shape[1]:
+        scratch["size"] = shape[0] * shape[1]
+        scratch["chars"] = np.empty(scratch["size"], dtype=np.uint8)
+        scratch["keep"] = np.empty(scratch["size"], dtype=bool)
+    chars = scratch["chars"][: shape[0] * shape[1]].reshape(shape)
+    keep = scratch["keep"][: shape[0] * shape[1]].reshape(shape)
+    keep.fill(True)
+    masked = False
+
+    col = 0
+    for i, (column, width) in enumerate(zip(fixed, widths)):
+        pad = width - column.width
+        keep[:, col : col + pad] = False
+        masked |= column.place(chars, keep, col + pad) or pad > 0
+        if column.special_text:
+            column.width = width
+            column.place_special(chars, keep, col)
+        col += width
+        chars[:, col] = ord("\n") if i == len(fixed) - 1 else ord(",")
+        col += 1
+
+    return chars[keep] if masked else chars.reshape(-1)
+
+
+def time_precision_for(hz_acq: float, start_time: float = 0.0) -> int:
+    """
+    Smallest number of decimals that represents start_time + i / hz_acq exactly,
+    e.g. 6 for 1 MHz from a round start time. Falls back to CSV_TIME_PRECISION.
+    """
+    for precision in range(CSV_TIME_PRECISION):
+        scale = 10**precision
+        step = scale / hz_acq
+        if abs(step - round(step)) < 1e-9 and abs(start_time * scale - round(start_time * scale)) < 1e-6:
+            return precision
+    return CSV_TIME_PRECISION
+
+
+def write_signal_csv(
+    filename: str,
+    samples,
+    hz_acq: float,
+    start_time: float = 0.0,
+    time_precision: int = None,
+    signal_precision: int = CSV_SIGNAL_PRECISION,
+    chunk_rows: int = CSV_CHUNK_ROWS,
+    scale: float = None,
+    offset: float = 0.0,
+):
+    """
+    Write samples to a "time,signal" CSV file, where time = start_time + i / hz_acq.
+
+    :param samples: 1-D array-like of signal values (volts).
+    :param time_precision: Decimals written for the time column (0-9), None picks the
+        smallest exact one for the sample rate (see time_precision_for).
+    :param signal_precision: Decimals written for the signal column (0-9).
+    :param chunk_rows: Rows formatted and written per chunk. Small chunks keep the
+        working set in the CPU cache and bound the temporary memory.
+    :param scale: For raw ADC counts, volts per count; the signal written is
+        samples * scale + offset, converted one chunk at a time.
+    """
+    if time_precision is None:
+        time_precision = time_precision_for(hz_acq, start_time)
+
+    samples = np.asarray(samples)
+    scratch = {}
+    with open(filename, "wb") as f:
+        f.write(b"time,signal\n")
+        for begin in range(0, len(samples), chunk_rows):
+            chunk = samples[begin : begin + chunk_rows]
+            if scale is not None:
+                chunk = chunk * scale + offset
+            times = start_time + np.arange(begin, begin + len(chunk)) * (1.0 / hz_acq)
+            f.write(format_rows((times, chunk), (time_precision, signal_precision), scratch))
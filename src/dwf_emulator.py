@@ -0,0 +1,399 @@
+# dwf_emulator.py
+# In-process stand-in for the WaveForms SDK library (libdwf.so / dwf.dll).
+# It implements the subset of FDwf* functions that IOController and Recorder call,
+# with the same ctypes calling conventions, so the acquisition loop, the action
+# scheduler and the save path can be exercised and benchmarked without an
+# Analog Discovery attached.
+
+from ctypes import byref, c_int, c_void_p, cast, memmove, sizeof, c_double, c_short
+import threading
+import time
+import numpy as np
+
+from src import dwfconstants
+from src.constants import ADC_FULL_SCALE_COUNTS
+from src.utils import precise_sleep
+
+EMULATOR_VERSION = b"emulator-1.0"
+EMULATOR_HANDLE = 1
+EMULATOR_SYSTEM_CLOCK_HZ = 100e6  # DigitalOut / AnalogIn base clock of the AD2
+EMULATOR_FIFO_SAMPLES = 32768  # device-side buffer, overflow is reported as cLost
+
+_CArgObject = type(byref(c_int()))
+
+
+def _value(arg):
+    """Unwrap a ctypes scalar (or a byref() to one) into a plain Python value."""
+    if isinstance(arg, _CArgObject):
+        arg = arg._obj
+    return getattr(arg, "value", arg)
+
+
+def _store(ref, value):
+    """Write value into an out-parameter passed as byref(x) or as the ctypes object itself."""
+    if ref is None:
+        return
+    obj = ref._obj if isinstance(ref, _CArgObject) else ref
+    obj.value = value
+
+
+def _address(buffer) -> int:
+    """Return the address a buffer argument points at, honouring byref(buffer, offset)."""
+    return cast(buffer, c_void_p).value
+
+
+def default_signal(t: np.ndarray, red: np.ndarray, green: np.ndarray, rng) -> np.ndarray:
+    """
+    Simple detector model: a dark offset, a response proportional to both LED drive
+    voltages and a little Gaussian noise. Good enough to see the LED edges in the data.
+    """
+    return 0.01 + 0.05 * red + 0.2 * green + rng.normal(0.0, 0.002, size=t.shape)
+
+
+class DwfEmulator:
+    """
+    Emulates one Analog Discovery behind the FDwf* C API.
+
+    Samples are produced in real time at the configured AnalogIn frequency: the number
+    of acquired samples is derived from time.perf_counter() since the acquisition was
+    started, and values are generated lazily when FDwfAnalogInStatusData copies them out.
+    The AnalogOut amplitudes set on the two LED channels are tracked over time so the
+    generated signal follows the protocol.
+
+    Fault injection:
+    - inject_lost_samples(start, count): drop a range of samples, reported as cLost
+    - inject_corrupted_samples(start, count): garble a range, reported as cCorrupted
+    - inject_stall(at_s, duration_s): block one FDwfAnalogInStatus call (USB stall)
+    - call_latency_s: fixed latency added to every FDwf* call
+    Overrunning the device FIFO (fifo_samples) also produces cLost, as on hardware.
+    """
+
+    def __init__(
+        self,
+        signal_fn=None,
+        fifo_samples: int = EMULATOR_FIFO_SAMPLES,
+        call_latency_s: float = 0.0,
+        seed: int = None,
+        record_calls: bool = False,
+    ):
+        self.signal_fn = signal_fn or default_signal
+        self.fifo_samples = fifo_samples
+        self.call_latency_s = call_latency_s
+        self.rng = np.random.default_rng(seed)
+        self.record_calls = record_calls
+        self.status_call_times = []  # perf_counter of each FDwfAnalogInStatus, if record_calls
+
+        self._lock = threading.Lock()
+        self._lost_ranges = []  # [start, stop) sample ranges
+        self._corrupted_ranges = []
+        self._stalls = []  # [at_s, duration_s], relative to acquisition start
+
+        self.is_open = False
+        self.last_error = b""
+
+        # digital IO
+        self.pin_output_enable = 0
+        self.pin_state = 0
+
+        # analog out: per channel (change_times, amplitudes) pairs
+        self.analog_out = {}
+        self._led_history = {0: ([0.0], [0.0]), 1: ([0.0], [0.0])}
+
+        # analog in
+        self.hz_acq = 100e6 / 1000
+        self.channel_range = {}
+        self.channel_offset = {}
+        self.channel_enabled = {}
+        self.acquisition_mode = None
+        self.record_length_s = -1.0
+        self.trigger_source = 0
+        self._running = False
+        self._t_start = None
+        self._next_sample = 0  # first sample not yet handed out by FDwfAnalogInStatus
+        self._chunk = (0, 0, 0, 0)  # (start, available, lost, corrupted) of the last status
+
+    # ------------------------------------------------------------------ fault injection
+    def inject_lost_samples(self, start: int, count: int):
+        self._lost_ranges.append((int(start), int(start) + int(count)))
+        self._lost_ranges.sort()
+
+    def inject_corrupted_samples(self, start: int, count: int):
+        self._corrupted_ranges.append((int(start), int(start) + int(count)))
+        self._corrupted_ranges.sort()
+
+    def inject_stall(self, at_s: float, duration_s: float):
+        self._stalls.append([at_s, duration_s])
+        self._stalls.sort()
+
+    def _latency(self):
+        if self.call_latency_s > 0:
+            precise_sleep(self.call_latency_s)
+
+    # ------------------------------------------------------------------ device
+    def FDwfGetVersion(self, version):
+        version.value = EMULATOR_VERSION
+        return 1
+
+    def FDwfGetLastErrorMsg(self, szerr):
+        szerr.value = self.last_error
+        return 1
+
+    def FDwfDeviceOpen(self, idx_device, phdwf):
+        self._latency()
+        self.is_open = True
+        _store(phdwf, EMULATOR_HANDLE)
+        return 1
+
+    def FDwfDeviceCloseAll(self):
+        self.is_open = False
+        self._running = False
+        return 1
+
+    def FDwfDeviceClose(self, hdwf):
+        return self.FDwfDeviceCloseAll()
+
+    # ------------------------------------------------------------------ digital IO / out
+    def FDwfDigitalOutInternalClockInfo(self, hdwf, phzFreq):
+        _store(phzFreq, EMULATOR_SYSTEM_CLOCK_HZ)
+        return 1
+
+    def FDwfDigitalOutReset(self, hdwf):
+        return 1
+
+    def FDwfDigitalIOOutputEnableSet(self, hdwf, fsOutputEnable, *args):
+        self._latency()
+        self.pin_output_enable = int(_value(fsOutputEnable))
+        return 1
+
+    def FDwfDigitalIOOutputSet(self, hdwf, fsOutput):
+        self._latency()
+        self.pin_state = int(_value(fsOutput))
+        return 1
+
+    def FDwfDigitalIOStatus(self, hdwf):
+        self._latency()
+        return 1
+
+    def FDwfDigitalIOInputStatus(self, hdwf, pfsInput):
+        _store(pfsInput, self.pin_state & self.pin_output_enable)
+        return 1
+
+    # ------------------------------------------------------------------ analog out
+    def _out(self, channel):
+        return self.analog_out.setdefault(int(_value(channel)), {"amplitude": 0.0})
+
+    def FDwfAnalogOutNodeEnableSet(self, hdwf, channel, node, enable):
+        self._out(channel)["enabled"] = bool(_value(enable))
+        return 1
+
+    def FDwfAnalogOutIdleSet(self, hdwf, channel, idle):
+        self._out(channel)["idle"] = _value(idle)
+        return 1
+
+    def FDwfAnalogOutNodeFunctionSet(self, hdwf, channel, node, func):
+        self._out(channel)["function"] = _value(func)
+        return 1
+
+    def FDwfAnalogOutNodeFrequencySet(self, hdwf, channel, node, hz):
+        self._out(channel)["frequency"] = _value(hz)
+        return 1
+
+    def FDwfAnalogOutNodeOffsetSet(self, hdwf, channel, node, offset):
+        self._out(channel)["offset"] = _value(offset)
+        return 1
+
+    def FDwfAnalogOutWaitSet(self, hdwf, channel, wait_s):
+        self._out(channel)["wait"] = _value(wait_s)
+        return 1
+
+    def FDwfAnalogOutRepeatSet(self, hdwf, channel, repeat):
+        self._out(channel)["repeat"] = _value(repeat)
+        return 1
+
+    def FDwfAnalogOutNodeAmplitudeSet(self, hdwf, channel, node, amplitude):
+        self._latency()
+        self._out(channel)["pending_amplitude"] = float(_value(amplitude))
+        return 1
+
+    def FDwfAnalogOutConfigure(self, hdwf, channel, start):
+        self._latency()
+        out = self._out(channel)
+        amplitude = out.pop("pending_amplitude", out["amplitude"])
+        out["amplitude"] = amplitude
+        times, values = self._led_history.setdefault(int(_value(channel)), ([0.0], [0.0]))
+        with self._lock:
+            times.append(time.perf_counter())
+            values.append(amplitude)
+        return 1
+
+    def _led_amplitude_at(self, channel: int, t: np.ndarray) -> np.ndarray:
+        times, values = self._led_history.get(channel, ([0.0], [0.0]))
+        with self._lock:
+            times_arr = np.asarray(times)
+            values_arr = np.asarray(values)
+        idx = np.searchsorted(times_arr, t, side="right") - 1
+        return values_arr[np.clip(idx, 0, len(values_arr) - 1)]
+
+    # ------------------------------------------------------------------ analog in
+    def FDwfAnalogInChannelEnableSet(self, hdwf, channel, enable):
+        self.channel_enabled[int(_value(channel))] = bool(_value(enable))
+        return 1
+
+    def FDwfAnalogInChannelRangeSet(self, hdwf, channel, volts):
+        self.channel_range[int(_value(channel))] = float(_value(volts))
+        return 1
+
+    def FDwfAnalogInChannelRangeGet(self, hdwf, channel, pvolts):
+        _store(pvolts, self.channel_range.get(int(_value(channel)), 5.0))
+        return 1
+
+    def FDwfAnalogInChannelOffsetSet(self, hdwf, channel, volts):
+        self.channel_offset[int(_value(channel))] = float(_value(volts))
+        return 1
+
+    def FDwfAnalogInChannelOffsetGet(self, hdwf, channel, pvolts):
+        _store(pvolts, self.channel_offset.get(int(_value(channel)), 0.0))
+        return 1
+
+    def FDwfAnalogInAcquisitionModeSet(self, hdwf, mode):
+        self.acquisition_mode = _value(mode)
+        return 1
+
+    def FDwfAnalogInFrequencySet(self, hdwf, hz):
+        # the device divides its system clock, so the achieved rate is quantised
+        divider = max(1, round(EMULATOR_SYSTEM_CLOCK_HZ / float(_value(hz))))
+        self.hz_acq = EMULATOR_SYSTEM_CLOCK_HZ / divider
+        return 1
+
+    def FDwfAnalogInFrequencyGet(self, hdwf, phz):
+        _store(phz, self.hz_acq)
+        return 1
+
+    def FDwfAnalogInRecordLengthSet(self, hdwf, length_s):
+        self.record_length_s = float(_value(length_s))
+        return 1
+
+    def FDwfAnalogInTriggerSourceSet(self, hdwf, source):
+        self.trigger_source = int(_value(source))
+        return 1
+
+    def FDwfAnalogInConfigure(self, hdwf, reconfigure, start):
+        self._latency()
+        if _value(start):
+            self._running = True
+            self._t_start = time.perf_counter()
+            self._next_sample = 0
+            self._chunk = (0, 0, 0, 0)
+        else:
+            self._running = False
+        return 1
+
+    def _acquired_samples(self, now: float) -> int:
+        if not self._running:
+            return self._next_sample
+        acquired = int((now - self._t_start) * self.hz_acq)
+        if self.record_length_s > 0:
+            acquired = min(acquired, int(self.record_length_s * self.hz_acq))
+        return acquired
+
+    def _apply_stall(self, now: float) -> float:
+        if self._stalls and self._t_start is not None and now - self._t_start >= self._stalls[0][0]:
+            _, duration_s = self._stalls.pop(0)
+            time.sleep(duration_s)
+            now = time.perf_counter()
+        return now
+
+    def FDwfAnalogInStatus(self, hdwf, read_data, psts):
+        self._latency()
+        now = time.perf_counter()
+        if self.record_calls:
+            self.status_call_times.append(now)
+        now = self._apply_stall(now)
+
+        if not self._running:
+            _store(psts, dwfconstants.DwfStateReady.value)
+            return 1
+
+        start = self._next_sample
+        acquired = self._acquired_samples(now)
+        lost = 0
+
+        # anything the host did not fetch in time has been overwritten on the device
+        if acquired - start > self.fifo_samples:
+            lost = acquired - start - self.fifo_samples
+            start += lost
+
+        # injected gaps: report the gap as lost, or stop the chunk right before it
+        for lo, hi in self._lost_ranges:
+            if hi <= start or lo >= acquired:
+                continue
+            if lo <= start:
+                lost += min(hi, acquired) - start
+                start = min(hi, acquired)
+            else:
+                acquired = lo
+            break
+
+        available = max(0, acquired - start)
+        corrupted = sum(
+            max(0, min(hi, start + available) - max(lo, start)) for lo, hi in self._corrupted_ranges
+        )
+        self._chunk = (start, available, lost, corrupted)
+        self._next_sample = start + available
+
+        done = self.record_length_s > 0 and self._next_sample >= int(self.record_length_s * self.hz_acq)
+        state = dwfconstants.DwfStateDone if done else dwfconstants.DwfStateRunning
+        _store(psts, state.value)
+        return 1
+
+    def FDwfAnalogInStatusRecord(self, hdwf, pcdDataAvailable, pcdDataLost, pcdDataCorrupt):
+        _, available, lost, corrupted = self._chunk
+        _store(pcdDataAvailable, available)
+        _store(pcdDataLost, lost)
+        _store(pcdDataCorrupt, corrupted)
+        return 1
+
+    def _generate(self, start: int, count: int) -> np.ndarray:
+        t = self._t_start + (start + np.arange(count)) / self.hz_acq
+        red = self._led_amplitude_at(0, t)
+        green = self._led_amplitude_at(1, t)
+        samples = np.asarray(self.signal_fn(t, red, green, self.rng), dtype=np.float64)
+
+        for lo, hi in self._corrupted_ranges:
+            a, b = max(lo, start), min(hi, start + count)
+            if a < b:
+                samples[a - start : b - start] = self.rng.uniform(-1e3, 1e3, size=b - a)
+
+        half_range = self.channel_range.get(0, 5.0) / 2
+        offset = self.channel_offset.get(0, 0.0)
+        return np.clip(samples, offset - half_range, offset + half_range)
+
+    def FDwfAnalogInStatusData(self, hdwf, channel, rgdVoltData, cdData):
+        return self.FDwfAnalogInStatusData2(hdwf, channel, rgdVoltData, 0, cdData)
+
+    def FDwfAnalogInStatusData2(self, hdwf, channel, rgdVoltData, idxData, cdData):
+        self._latency()
+        start, available, _, _ = self._chunk
+        first = int(_value(idxData))
+        count = min(int(_value(cdData)), available - first)
+        if count <= 0:
+            return 1
+        samples = self._generate(start + first, count)
+        memmove(_address(rgdVoltData), samples.ctypes.data, count * sizeof(c_double))
+        return 1
+
+    def FDwfAnalogInStatusData16(self, hdwf, channel, rgu16Data, idxData, cdData):
+        self._latency()
+        start, available, _, _ = self._chunk
+        first = int(_value(idxData))
+        count = min(int(_value(cdData)), available - first)
+        if count <= 0:
+            return 1
+        idx = int(_value(channel))
+        volts = self._generate(start + first, count)
+        # signed counts of the ADC, volts = counts * range / ADC_FULL_SCALE_COUNTS + offset
+        step = self.channel_range.get(idx, 5.0) / ADC_FULL_SCALE_COUNTS
+        counts = np.clip(np.rint((volts - self.channel_offset.get(idx, 0.0)) / step), -32768, 32767)
+        counts = counts.astype(np.int16)
+        memmove(_address(rgu16Data), counts.ctypes.data, count * sizeof(c_short))
+        return 1
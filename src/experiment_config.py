@@ -3,6 +3,7 @@ from typing import Optional
 import os
 import json
 from src.event_logger import EventLogger
+from src.constants import SAVE_FORMAT_CSV, SAVE_FORMATS, PHASE_MAX_S, STREAM_PHASE_MAX_S
 
 def ensure_file_suffix(filename: str, suffix: str = ".csv") -> str:
     """Ensure the filename ends with the specified suffix."""
@@ -22,6 +23,9 @@ class ExperimentConfig:
     channel_range: int = 2  # Default range for the channel, e.g., 2V
     filename: str = "record.csv"
     action_epsilon_s: float = 0.001  # Ensure actions are executed with minimal delay
+    save_format: str = SAVE_FORMAT_CSV  # "csv", "npy" (binary, memory-mappable) or "both"
+    raw_adc: bool = False  # record int16 ADC counts, converted to volts when read
+    stream_to_disk: bool = False  # append samples to the .npy file while recording, for long runs
     event_logger: EventLogger = field(default_factory=EventLogger)
 
     # print the configuration in a readable format
@@ -41,6 +45,9 @@ class ExperimentConfig:
             f"  - Input Range: ±{self.channel_range/2:.1f} V\n"
             f"  - Output File: {os.path.basename(self.filename)}\n"
             f"  - Action Epsilon: {self.action_epsilon_s:.6f} s\n"
+            f"  - Save Format: {self.save_format}\n"
+            f"  - Raw ADC Samples: {self.raw_adc}\n"
+            f"  - Stream To Disk: {self.stream_to_disk}\n"
         )
 
         if self.event_logger and self.event_logger.get_events():
@@ -69,6 +76,13 @@ class ExperimentConfig:
             _channel_range = int(data.get("channel_range", 2))    
             _filename = ensure_file_suffix(data.get("filename", "record.csv"))
             _action_epsilon_s = float(data.get("action_epsilon_s", 0.001))
+            _save_format = str(data.get("save_format", SAVE_FORMAT_CSV))
+            if _save_format not in SAVE_FORMATS:
+                raise ValueError(f"save_format must be one of {SAVE_FORMATS}, got '{_save_format}'")
+            _raw_adc = bool(data.get("raw_adc", False))
+            _stream_to_disk = bool(data.get("stream_to_disk", False))
+            # phases are held in memory unless streamed to disk
+            max_phase_s = STREAM_PHASE_MAX_S if _stream_to_disk else PHASE_MAX_S
 
             cfg = cls(
                 actinic_led_intensity=clamp(_actinic_led_intensity, 0, 100),
@@ -76,15 +90,18 @@ class ExperimentConfig:
                 recording_hz=clamp(
                     _recording_hz, 1000, 1000000
                 ),  # e.g. min 1kHz, max 1MHz
-                ared_duration_s=clamp(_ared_duration_s, 0.0, 10.0),  # max 10 seconds
+                ared_duration_s=clamp(_ared_duration_s, 0.0, max_phase_s),  # max 10 seconds, or 24 h streaming
                 wait_after_ared_s=clamp(
-                    _wait_after_ared_s, 0.0, 10.0
-                ),  # max 10 seconds
-                agreen_delay_s=clamp(_agreen_delay_s, 0.0, 10.0),  # max 10 seconds
-                agreen_duration_s=clamp(_agreen_duration, 0.0, 10.0),  # max 10 seconds
+                    _wait_after_ared_s, 0.0, max_phase_s
+                ),
+                agreen_delay_s=clamp(_agreen_delay_s, 0.0, max_phase_s),
+                agreen_duration_s=clamp(_agreen_duration, 0.0, max_phase_s),
                 channel_range=_channel_range,
                 filename=_filename,
                 action_epsilon_s=clamp(_action_epsilon_s, 0.0, 0.1),  # max 100ms epsilon
+                save_format=_save_format,
+                raw_adc=_raw_adc,
+                stream_to_disk=_stream_to_disk,
                 )
 
             # Handle event_logger if present
@@ -114,6 +131,9 @@ class ExperimentConfig:
             "channel_range": self.channel_range,
             "filename": self.filename,
             "action_epsilon_s": self.action_epsilon_s,
+            "save_format": self.save_format,
+            "raw_adc": self.raw_adc,
+            "stream_to_disk": self.stream_to_disk,
             "event_logger": self.event_logger.to_dict() if self.event_logger else None
         }
 
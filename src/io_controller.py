@@ -1,5 +1,6 @@
 from ctypes import *
 from src import dwfconstants
+import os
 import time
 import sys
 from src.recorder import Recorder
@@ -20,6 +21,9 @@ from src.constants import (
     OUTPUT_MASK_ALL,
     STRING_BUFFER_SIZE,
     ANALOG_IN_CHANNEL,
+    DWF_BACKEND_HARDWARE,
+    DWF_BACKEND_EMULATOR,
+    DWF_BACKEND_ENV_VAR,
 )
 
 
@@ -29,7 +33,7 @@ from src.constants import (
 # Shutter mode set to N.O. (normally open)
 """
 Device Lifecycle:
-    open_device()  # Load DWF library, open device, set up pins
+    open_device(backend=None)  # Load DWF library (or the emulator), open device, set up pins
     close_device()  # Reset digital output, close device
     cleanup()  # Close device and clear stop event
     cancel_task()  # Signal the task to stop
@@ -45,11 +49,35 @@ Recording:
     record_and_save(channel, n_samples, hz_acq=100000, filename="record_1.csv")  # Record data and save to file
 """
 
+def load_dwf_library(backend=DWF_BACKEND_HARDWARE):
+    """
+    Load the DWF API for the requested backend.
+    :param backend: "hardware" for the WaveForms SDK library, "emulator" for an in-process
+        DwfEmulator, or an already constructed emulator instance (e.g. with injected faults).
+    """
+    if backend == DWF_BACKEND_EMULATOR:
+        from src.dwf_emulator import DwfEmulator
+
+        return DwfEmulator()
+
+    if backend != DWF_BACKEND_HARDWARE:
+        return backend  # a preconfigured emulator (or any object exposing the FDwf* API)
+
+    if sys.platform.startswith("win"):
+        return cdll.dwf
+    elif sys.platform.startswith("darwin"):
+        return cdll.LoadLibrary("/Library/Frameworks/dwf.framework/dwf")
+    else:
+        return cdll.LoadLibrary("libdwf.so")
+
+
 class IOController:
-    def __init__(self):
+    def __init__(self, backend=None):
         self._stop_event = threading.Event()
         self.hdwf = None # handle for the self.dwf library, set during open_device
         self.dwf = None  # DWF library handle, set during open_device
+        # which DWF backend open_device() loads, see load_dwf_library()
+        self.backend = backend or os.environ.get(DWF_BACKEND_ENV_VAR, DWF_BACKEND_HARDWARE)
 
         # Initialize system clock and pins
         self.hzSys = c_double()
@@ -66,18 +94,20 @@ class IOController:
         # ensure that the trigger pin is set to high to begin with
         self.set_pin(PIN_TRIGGER, 1)
 
-    def open_device(self):
+    def open_device(self, backend=None):
+        """
+        Load the DWF library and open the first device.
+        :param backend: Optional override of self.backend ("hardware", "emulator" or an emulator instance).
+        """
         if self.hdwf:
             print("Device already opened.")
             return
 
+        if backend is not None:
+            self.backend = backend
+
         # Load the DWF library
-        if sys.platform.startswith("win"):
-            self.dwf = cdll.dwf
-        elif sys.platform.startswith("darwin"):
-            self.dwf = cdll.LoadLibrary("/Library/Frameworks/dwf.framework/dwf")
-        else:
-            self.dwf = cdll.LoadLibrary("libdwf.so")
+        self.dwf = load_dwf_library(self.backend)
 
         if self.dwf == None:
             raise RuntimeError("Failed to load DWF library. Ensure it is installed correctly.")
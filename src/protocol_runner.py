@@ -3,7 +3,18 @@ from src.recorder import Recorder
 from src.experiment_config import ExperimentConfig
 from src.timed_action_factory import TimedActionFactory
 import time
-from src.constants import ANALOG_IN_CHANNEL, DELAY_BEFORE_RECORDING_START, LED_GREEN_PIN, LED_RED_PIN
+import json
+import os
+from src.constants import (
+    ANALOG_IN_CHANNEL,
+    DELAY_BEFORE_RECORDING_START,
+    LED_GREEN_PIN,
+    LED_RED_PIN,
+    SAVE_FORMAT_CSV,
+    SAVE_FORMAT_NPY,
+    SAVE_FORMAT_BOTH,
+)
+from src.run_file import RUN_FORMAT_VERSION, save_samples, samples_filename_for
 from src.utils import calculate_samples_from_config, intensity_to_voltage, calculate_total_recording_length
 
 class ProtocolRunner:
@@ -78,11 +89,21 @@ class ProtocolRunner:
             n_samples=n_samples,
             hz_acq=cfg.recording_hz,
             channel_range=cfg.channel_range,
+            raw=cfg.raw_adc,
         )
         logger.log_event("recorder_prepared")
 
-        # Record and apply timed actions
-        samples, n, lost, corrupted, debug_messages = self.recorder.complete_recording(actions=actions, stop_flag=self.stop_flag, debug=debug)
+        stream_to = None
+        if cfg.stream_to_disk and cfg.filename:
+            # the sidecar is written first, so a partial stream file can be loaded after a crash
+            stream_to = samples_filename_for(cfg.filename)
+            self.save_metadata(cfg, {**self.recorder.get_run_info(), "samples_file": os.path.basename(stream_to), "complete": False})
+
+        # Record and apply timed actions; samples is a numpy array owned by us from here on,
+        # float64 volts or int16 ADC counts (raw_adc), which are only converted when written as CSV
+        samples, n, lost, corrupted, debug_messages = self.recorder.complete_recording(
+            actions=actions, stop_flag=self.stop_flag, debug=debug, stream_to=stream_to
+        )
 
         # Close shutter
         self.io.toggle_shutter(False)
@@ -95,9 +116,19 @@ class ProtocolRunner:
         data_start_time = logger.get_event_time(
             "action_ared_on_executed_at_+0.000_s"
         )
-        self.recorder.save_data(samples, cfg.recording_hz, data_start_time, cfg.filename)
+        run_info = self.recorder.get_run_info()
+        run_info["start_time_s"] = data_start_time or 0.0
 
-        self.save_metadata(cfg)
+        if cfg.save_format in (SAVE_FORMAT_CSV, SAVE_FORMAT_BOTH):
+            self.recorder.save_data(samples, cfg.recording_hz, data_start_time, cfg.filename)
+        if stream_to:
+            run_info["samples_file"] = os.path.basename(stream_to)
+            run_info["complete"] = True
+        elif cfg.save_format in (SAVE_FORMAT_NPY, SAVE_FORMAT_BOTH) and cfg.filename:
+            samples_path = save_samples(cfg.filename, samples)
+            run_info["samples_file"] = os.path.basename(samples_path)
+
+        self.save_metadata(cfg, run_info)
 
         self.io.close_device()
 
@@ -111,19 +142,20 @@ class ProtocolRunner:
         metadata_filename = csv_filename.replace(".csv", "_metadata.json")
         return metadata_filename
 
-    def save_metadata(self, cfg: ExperimentConfig):
+    def save_metadata(self, cfg: ExperimentConfig, run_info: dict = None):
         """        Save metadata about the experiment to a file.
         :param cfg: Experiment configuration containing metadata.
+        :param run_info: Optional description of the recorded data (sample rate, t_zero
+            sample index, binary samples file, ...) stored under the "run" key.
         """
-        # use the ExperimentConfig's to_json method to get the metadata or maybe ... its
-        # #adataclass so does it have that ability already?
-
         metadata = cfg.to_dict()
+        if run_info is not None:
+            metadata["run"] = {"format_version": RUN_FORMAT_VERSION, **run_info}
 
         if cfg.filename:
             metadata_filename = self.make_json_filename(cfg.filename)
 
             with open(metadata_filename, "w") as f:
-                f.write(cfg.to_json())
+                f.write(json.dumps(metadata, indent=4))
         else:
             print("No filename provided, metadata not saved.")
@@ -1,15 +1,28 @@
 from ctypes import *
+import sys
+import threading
 import time
 from src import dwfconstants
 import numpy as np
 from src.event_logger import EventLogger
 from src.timed_action import TimedAction
-import numpy as np
+from src.csv_writer import write_signal_csv
+from src.ring_buffer import RingBuffer, RingConsumer
+from src.run_file import StreamingSampleWriter
 from numpy.ctypeslib import as_array
 from src.constants import (
     ANALOG_IN_CHANNEL,
     ANALOG_TRIGGER_STATE,
-    ANALOG_RECORD_FOREVER,)
+    ANALOG_RECORD_FOREVER,
+    ADC_FULL_SCALE_COUNTS,
+    CSV_SIGNAL_PRECISION,
+    RECORDER_RING_SECONDS,
+    RECORDER_RING_MIN_SAMPLES,
+    STREAM_CHUNK_SAMPLES,
+    STREAM_FSYNC_INTERVAL_S,
+    STREAM_IDLE_SLEEP_S,
+    RECORDING_SWITCH_INTERVAL_S,
+    SCHEDULER_IDLE_SLEEP_S,)
 from typing import Optional, Tuple
 
 
@@ -26,8 +39,17 @@ class Recorder:
         self.n_samples = None
         self.hz_acq = None
         self.channel_range = None
-
-    def prepare_recording(self, logger, channel, n_samples, hz_acq, channel_range):
+        self.raw = False  # record int16 ADC counts instead of float64 volts
+        self.adc_scale = None  # volts per count, set by prepare_recording
+        self.adc_offset = 0.0  # volts at count 0
+        self.ring = None  # RingBuffer the drain loop writes into, created by prepare_recording
+        self.hz_acq_actual = None  # rate confirmed by the device in prepare_recording
+        self.data_index = (None, None)  # (t_zero sample index, end sample index) of the last recording
+        self.n_recorded = 0
+        self.lost = 0
+        self.corrupted = 0
+
+    def prepare_recording(self, logger, channel, n_samples, hz_acq, channel_range, raw=False):
         """
         Prepare the recording setup for the specified channel.
         :param logger: An instance of EventLogger for logging events.
@@ -35,12 +57,19 @@ class Recorder:
         :param n_samples: Number of samples to record.
         :param hz_acq: Acquisition frequency in Hz.
         :param channel_range: The range for the analog input channel in volts. Either 5 or 50.
+        :param raw: Record raw int16 ADC counts (2 bytes per sample) instead of float64 volts.
+            Convert with adc_scale and adc_offset: volts = counts * adc_scale + adc_offset.
         """
         self.logger = logger
         self.channel = channel
         self.n_samples = n_samples
         self.hz_acq = hz_acq
         self.channel_range = channel_range
+        self.raw = raw
+        self.ring = RingBuffer(
+            max(int(hz_acq * RECORDER_RING_SECONDS), RECORDER_RING_MIN_SAMPLES),
+            c_short if raw else c_double,
+        )
 
         logger.log_event("setup_recording")
 
@@ -57,15 +86,30 @@ class Recorder:
 
         hz_acq = c_double()
         self.dwf.FDwfAnalogInFrequencyGet(self.hdwf, byref(hz_acq))
+        self.hz_acq_actual = hz_acq.value
         print(f"Confirmed acquisition frequency: {hz_acq.value}")
 
         channel_range = c_double()
         self.dwf.FDwfAnalogInChannelRangeGet(self.hdwf, c_int(self.channel), byref(channel_range))
         print(f"Channel {self.channel} range: {channel_range.value} V")
 
+        channel_offset = c_double()
+        self.dwf.FDwfAnalogInChannelOffsetGet(self.hdwf, c_int(self.channel), byref(channel_offset))
+        self.adc_scale = channel_range.value / ADC_FULL_SCALE_COUNTS
+        self.adc_offset = channel_offset.value
+
         self.dwf.FDwfAnalogInTriggerSourceSet(self.hdwf, c_int(ANALOG_TRIGGER_STATE))  # 0 = trigsrcNone
         self.dwf.FDwfAnalogInConfigure(self.hdwf, c_int(0), c_int(1))
 
+    def add_consumer(self, name: str = None, from_start: bool = False) -> RingConsumer:
+        """
+        Register a reader of the samples as they are acquired (live plot, online analysis, ...).
+        Call after prepare_recording; each consumer reads at its own pace from the ring buffer.
+        """
+        if self.ring is None:
+            raise RuntimeError("prepare_recording must be called before adding consumers")
+        return self.ring.add_consumer(name, from_start)
+
     def flush_input_buffer(self):
         sts = c_byte()
         cAvailable = c_int()
@@ -142,31 +186,28 @@ class Recorder:
         return t_zero, data_index
 
     def complete_recording(
-        self, actions: list["TimedAction"] = None, stop_flag=None, debug=False
+        self, actions: list["TimedAction"] = None, stop_flag=None, debug=False, threaded=True, stream_to=None
     ):
         """
         Complete the recording process and return the recorded data.
         :param actions: A list of TimedAction instances to execute during recording.
-        :return: A tuple (rgdSamples, total_samples, lost_flag, corrupted_flag)
+        :param threaded: Drain the device in a producer thread and execute the actions in a
+            separate scheduler thread, so a blocking action cannot delay the drain and cause
+            lost samples. False runs both in one polling loop, actions after each data copy.
+        :param stream_to: Stream the samples to this .npy file as they arrive instead of
+            holding the run in memory (see StreamingSampleWriter). Memory use is then
+            bounded by the ring buffer, whatever the length of the run.
+        :return: A tuple (samples, total_samples, lost_flag, corrupted_flag, debug_messages)
+
+        samples is a float64 numpy array of volts, or an int16 array of ADC counts when
+        prepared with raw=True (see to_volts). It is a view over the run buffer allocated
+        for this call, which the Recorder holds no other reference to, so the caller owns
+        the data and may modify it. Consumers added with add_consumer see the samples
+        while the recording is running. When streaming, samples is a read-only memory
+        map of the file.
         """
-        sts = c_byte()
-        n_samples = self.n_samples
-        max_total_samples = int(n_samples * 4)
-        rgdSamples = (c_double * max_total_samples)()
-        np_buffer = np.ctypeslib.as_array(rgdSamples)
-
-        cAvailable = c_int()
-        cLost = c_int()
-        cSamples = 0
-        cCorrupted = c_int()
-        fLost = 0
-        fCorrupted = 0
-        loopCounter = 0
-
-        # for tracking the time of the first action execution, and the first data point
-        t_zero = None
-        dataIndex = (None, None) # begin index, end index
-        
+        # the drain writes into the ring buffer, the samples of the run are collected from it
+        np_buffer = None if stream_to else np.zeros(self.n_samples, dtype=self.ring.dtype)
 
         debug_messages = []
         if stop_flag is None:
@@ -184,6 +225,109 @@ class Recorder:
         start_time = self.wait_for_data_start()       
         self.logger.log_event(f"recording_loop_started_at_{start_time:.6f}")
 
+        # for tracking the time of the first action execution, and the first data point
+        self._t_zero = None
+        self._data_index = (None, None)  # begin index, end index
+
+        drain_done = threading.Event()
+        errors = []
+
+        def guarded(fn, *args, finished=None):
+            def run():
+                try:
+                    fn(*args)
+                except BaseException as e:  # re-raised in the calling thread
+                    errors.append(e)
+                    stop_flag["stop"] = True
+                finally:
+                    if finished is not None:
+                        finished.set()
+            return run
+
+        threads = []
+        writer = None
+        if stream_to:
+            writer = StreamingSampleWriter(stream_to, self.ring.dtype)
+            disk = self.ring.add_consumer("disk")
+            threads.append(threading.Thread(
+                target=guarded(self._stream, writer, disk, drain_done, debug_messages), name="recorder-writer"
+            ))
+
+        drain = guarded(self._drain, np_buffer, stop_flag, start_time, debug_messages, debug, finished=drain_done)
+        if threaded and actions:
+            threads.append(threading.Thread(target=drain, name="recorder-drain"))
+            threads.append(threading.Thread(
+                target=guarded(self._run_scheduler, actions, start_time, drain_done), name="action-scheduler"
+            ))
+        elif actions:
+            on_data = lambda: self._run_pending_actions(actions, start_time)
+            drain = guarded(
+                self._drain, np_buffer, stop_flag, start_time, debug_messages, debug, on_data, finished=drain_done
+            )
+
+        # a busy-waiting action holds the GIL until the interpreter forces a switch,
+        # keep that bounded so the drain thread gets to poll the device
+        switch_interval = sys.getswitchinterval()
+        if threads:
+            sys.setswitchinterval(RECORDING_SWITCH_INTERVAL_S)
+        try:
+            for thread in threads:
+                thread.start()
+            if not (threaded and actions):
+                drain()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+            if writer is not None:
+                writer.close()
+        if errors:
+            raise errors[0]
+
+        cSamples, fLost, fCorrupted = self._cSamples, self._fLost, self._fCorrupted
+        self.logger.log_event("recording_completed")
+
+        # Final logging
+        elapsed_time = time.perf_counter() - start_time
+
+        # if dataIndex is not None:
+        #     trimmed, true_sample_count = self._trim_samples(np_buffer, dataIndex)
+        # else:
+        if stream_to:
+            trimmed = np.load(stream_to, mmap_mode="r")[:cSamples]
+        else:
+            trimmed = np_buffer[:cSamples]
+        # true_sample_count = self._get_true_sample_count(trimmed, cSamples, dataIndex)
+        true_sample_count = cSamples
+        self.logger.log_event(f"acquired_{true_sample_count}_samples_in_{elapsed_time:.3f}_seconds")
+
+        self.data_index = self._data_index
+        self.n_recorded = true_sample_count
+        self.lost = fLost
+        self.corrupted = fCorrupted
+
+        return trimmed, true_sample_count, fLost, fCorrupted, debug_messages
+
+    def _drain(self, np_buffer, stop_flag, start_time, debug_messages, debug=False, on_data=None):
+        """
+        Producer loop: poll the device and copy the available samples into the ring buffer
+        until stop_flag is set or n_samples have been acquired, collecting the samples of
+        the run into np_buffer (unless it is None). The running totals are kept in self._cSamples, self._fLost
+        and self._fCorrupted.
+        :param on_data: Optional callable run after each copy (single-threaded mode).
+        """
+        sts = c_byte()
+        n_samples = self.n_samples
+        ring = self.ring
+        history = ring.add_consumer("history") if np_buffer is not None else None
+        cAvailable = c_int()
+        cLost = c_int()
+        cCorrupted = c_int()
+        self._cSamples = cSamples = 0
+        self._fLost = 0
+        self._fCorrupted = 0
+        loopCounter = 0
+
         while not stop_flag.get("stop", False):
             self.dwf.FDwfAnalogInStatus(self.hdwf, c_int(1), byref(sts))
 
@@ -199,12 +343,13 @@ class Recorder:
             )
 
             if cLost.value:
-                fLost = 1
+                self._fLost = 1
             if cCorrupted.value:
-                fCorrupted = 1
+                self._fCorrupted = 1
 
-            last_cSamples = cSamples
             cSamples += cLost.value  # Always account for lost samples
+            ring.skip(cLost.value)
+            self._cSamples = cSamples
 
             if cAvailable.value == 0:
                 continue
@@ -212,31 +357,25 @@ class Recorder:
             if remaining <= 0:
                 self.logger.log_event("max_samples_reached")
                 break
-            cAvailable = c_int(min(cAvailable.value, remaining))
+            cAvailable = c_int(min(cAvailable.value, remaining, ring.capacity))
 
-            self.dwf.FDwfAnalogInStatusData(
-                self.hdwf,
-                c_int(self.channel),
-                byref(rgdSamples, sizeof(c_double) * cSamples),
-                cAvailable,
-            )
-            
-            if actions:
-                updated_t_zero, updated_index = self._execute_pending_actions(
-                    actions=actions, 
-                    t_zero=t_zero, 
-                    start_time=start_time, 
-                    hz_acq=self.hz_acq, 
-                    data_index=dataIndex
-                )
-                if t_zero is None and updated_t_zero is not None:
-                    t_zero = updated_t_zero
-                    dataIndex = updated_index
+            # copy straight into the ring, in two parts when the chunk wraps around its end
+            offset, first = ring.reserve(cAvailable.value)
+            self._read_samples(ring, offset, 0, first)
+            if first < cAvailable.value:
+                self._read_samples(ring, 0, first, cAvailable.value - first)
+            ring.commit()
+            if history is not None:
+                history.read_into(np_buffer)
+
+            if on_data is not None:
+                on_data()
 
             cSamples += cAvailable.value
+            self._cSamples = cSamples
 
             # Sanity check for edge cases
-            if np_buffer[cSamples - 1] == 0.0:
+            if ring.last() == 0:
                 debug_messages.append(
                     f"Warning: Last sample is 0.0 at index {cSamples - 1}. This may indicate an issue with the recording."
                 )
@@ -245,20 +384,123 @@ class Recorder:
                 debug_messages.append("Overrun limit reached, forcing stop")
                 break
 
-        self.logger.log_event("recording_completed")
+        if history is not None:
+            history.read_into(np_buffer)  # lost samples skipped last
+            history.close()
 
-        # Final logging
-        elapsed_time = time.perf_counter() - start_time
+    def _stream(self, writer: "StreamingSampleWriter", consumer: RingConsumer, drain_done, debug_messages):
+        """
+        Writer loop: append the samples to the stream file as they come out of the ring,
+        syncing it to disk every STREAM_FSYNC_INTERVAL_S, until the drain has finished
+        and everything has been written.
+        """
+        last_sync = time.perf_counter()
+        while True:
+            finished = drain_done.is_set()
+            start, chunk = consumer.read(STREAM_CHUNK_SAMPLES)
+            if start > writer.count:  # overrun, keep the sample indices of the file aligned
+                debug_messages.append(f"Stream writer overrun, {start - writer.count} samples zeroed")
+                writer.append(np.zeros(start - writer.count, dtype=chunk.dtype))
+            writer.append(chunk)
+
+            now = time.perf_counter()
+            if now - last_sync >= STREAM_FSYNC_INTERVAL_S:
+                writer.sync()
+                last_sync = now
+            if finished and consumer.available() == 0:
+                break
+            if len(chunk) == 0:
+                drain_done.wait(STREAM_IDLE_SLEEP_S)
+        consumer.close()
+
+    def _read_samples(self, ring: RingBuffer, offset: int, first_sample: int, count: int):
+        """Copy count samples of the current device chunk, from first_sample on, to ring offset."""
+        if self.raw:
+            self.dwf.FDwfAnalogInStatusData16(
+                self.hdwf,
+                c_int(self.channel),
+                byref(ring.raw, ring.itemsize * offset),
+                c_int(first_sample),
+                c_int(count),
+            )
+        elif first_sample == 0:
+            self.dwf.FDwfAnalogInStatusData(
+                self.hdwf,
+                c_int(self.channel),
+                byref(ring.raw, ring.itemsize * offset),
+                c_int(count),
+            )
+        else:
+            self.dwf.FDwfAnalogInStatusData2(
+                self.hdwf,
+                c_int(self.channel),
+                byref(ring.raw, ring.itemsize * offset),
+                c_int(first_sample),
+                c_int(count),
+            )
 
-        # if dataIndex is not None:
-        #     trimmed, true_sample_count = self._trim_samples(rgdSamples, dataIndex)
-        # else:
-        trimmed = rgdSamples[:cSamples]
-        # true_sample_count = self._get_true_sample_count(trimmed, cSamples, dataIndex)
-        true_sample_count = cSamples
-        self.logger.log_event(f"acquired_{true_sample_count}_samples_in_{elapsed_time:.3f}_seconds")
+    def _run_pending_actions(self, actions, start_time):
+        """Run _execute_pending_actions once, keeping t_zero and the data index on the Recorder."""
+        updated_t_zero, updated_index = self._execute_pending_actions(
+            actions=actions, 
+            t_zero=self._t_zero, 
+            start_time=start_time, 
+            hz_acq=self.hz_acq, 
+            data_index=self._data_index
+        )
+        if self._t_zero is None and updated_t_zero is not None:
+            self._t_zero = updated_t_zero
+        if updated_index is not None:
+            self._data_index = updated_index
 
-        return trimmed, true_sample_count, fLost, fCorrupted, debug_messages
+    def _run_scheduler(self, actions, start_time, drain_done: threading.Event):
+        """
+        Scheduler loop: execute the actions against perf_counter until they have all run or
+        the drain has stopped. Between deadlines it sleeps, which releases the GIL to the
+        drain thread; close to a deadline it only yields.
+        """
+        while not drain_done.is_set():
+            self._run_pending_actions(actions, start_time)
+
+            pending = [a.action_time_s - a.epsilon for a in actions if not a._executed]
+            if not pending:
+                break
+            if self._t_zero is None:
+                time.sleep(0)
+                continue
+            wait_s = min(pending) - (time.perf_counter() - self._t_zero)
+            if wait_s > 2 * SCHEDULER_IDLE_SLEEP_S:
+                drain_done.wait(SCHEDULER_IDLE_SLEEP_S)
+            else:
+                time.sleep(0)
+
+    def get_run_info(self) -> dict:
+        """
+        Describe the last recording for the run metadata: sample rate, sample count,
+        the sample index of t_zero (the executed ared_on) and the lost/corrupted flags.
+        Raw recordings also carry the count to volt conversion (adc_scale, adc_offset).
+        """
+        t_zero_index, end_index = self.data_index
+        info = {
+            "hz_acq": self.hz_acq_actual or self.hz_acq,
+            "n_samples": self.n_recorded,
+            "t_zero_index": t_zero_index,
+            "end_index": end_index,
+            "lost": bool(self.lost),
+            "corrupted": bool(self.corrupted),
+            "sample_format": "int16" if self.raw else "float64",
+        }
+        if self.raw:
+            info["adc_scale"] = self.adc_scale
+            info["adc_offset"] = self.adc_offset
+        return info
+
+    def to_volts(self, samples) -> np.ndarray:
+        """Convert raw ADC counts to volts, float samples are returned unchanged."""
+        samples = np.asarray(samples)
+        if not np.issubdtype(samples.dtype, np.integer):
+            return samples
+        return samples * self.adc_scale + self.adc_offset
 
     def _get_true_sample_count(self, trimmed, cSamples, dataIndex):
         """Helper to determine the correct number of final samples acquired."""
@@ -280,21 +522,38 @@ class Recorder:
         trimmed = rgdSamples[dataIndex:end_index]
         return trimmed, len(trimmed)
 
-    def save_data(self, rgdSamples, hz_acq, start_time: float = None, filename = None):
+    def save_data(
+        self,
+        rgdSamples,
+        hz_acq,
+        start_time: float = None,
+        filename=None,
+        time_precision: int = None,
+        signal_precision: int = CSV_SIGNAL_PRECISION,
+    ):
         """
         Save the recorded data to a CSV file.
-        :param rgdSamples: The recorded samples, as the ctype array.
+        :param rgdSamples: The recorded samples, as the numpy array returned by complete_recording.
+            Raw ADC counts are converted to volts chunk by chunk while writing.
         :param filename: Name of the CSV file to save the data.
+        :param time_precision: Decimals for the time column, None picks an exact one for hz_acq.
+        :param signal_precision: Decimals for the signal column.
         """
         if start_time is None:
             # If no start time is provided, use 0.0
             start_time = 0.0
 
         if filename:
-            with open(filename, "w") as f:
-                f.write("time,signal\n")
-                for i, value in enumerate(rgdSamples):
-                    time_s = start_time + i * (1.0 / hz_acq)
-                    f.write(f"{time_s},{value}\n")
+            raw = np.issubdtype(np.asarray(rgdSamples).dtype, np.integer)
+            write_signal_csv(
+                filename,
+                rgdSamples,
+                hz_acq,
+                start_time=start_time,
+                time_precision=time_precision,
+                signal_precision=signal_precision,
+                scale=self.adc_scale if raw else None,
+                offset=self.adc_offset if raw else 0.0,
+            )
         else:
             print("No filename provided, skipping data save.")
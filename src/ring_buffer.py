@@ -0,0 +1,173 @@
+# ring_buffer.py
+# Fixed-size ring buffer for acquired samples, written by the Recorder drain loop and
+# read by any number of independent consumers (disk writer, live plot, online analysis).
+# Samples are addressed by their absolute index in the run, so a consumer always knows
+# which samples it got. The buffer is a ctypes array, so the device can copy straight
+# into it; memory use is fixed by the capacity, whatever the length of the run.
+#
+# There is a single producer. Consumers never block it: a consumer that falls more than
+# `capacity` samples behind loses the oldest samples, which is counted in its `overruns`.
+
+from ctypes import c_double, sizeof
+import threading
+import numpy as np
+
+
+class RingConsumer:
+    """A read cursor on a RingBuffer. Each consumer reads every sample at its own pace."""
+
+    def __init__(self, ring: "RingBuffer", name: str, position: int):
+        self.ring = ring
+        self.name = name
+        self.position = position  # absolute index of the next sample to read
+        self.overruns = 0  # samples overwritten before this consumer read them
+
+    def available(self) -> int:
+        return self.ring.head - self.position
+
+    def _skip_overwritten(self, limit: int) -> int:
+        """Move the cursor past samples that are (or are being) overwritten, returns the count skipped."""
+        oldest = limit - self.ring.capacity
+        if self.position >= oldest:
+            return 0
+        skipped = oldest - self.position
+        self.overruns += skipped
+        self.position = oldest
+        return skipped
+
+    def _copy(self, start: int, count: int, out: np.ndarray):
+        ring = self.ring
+        offset = start % ring.capacity
+        first = min(count, ring.capacity - offset)
+        out[:first] = ring.buffer[offset : offset + first]
+        out[first:count] = ring.buffer[: count - first]
+
+    def read(self, max_samples: int = None):
+        """
+        Copy the unread samples (at most max_samples) and advance the cursor.
+        :return: (start, samples): the absolute index of the first sample and the samples.
+        """
+        ring = self.ring
+        self._skip_overwritten(ring.reserved)
+        start = self.position
+        count = ring.head - start
+        if max_samples is not None:
+            count = min(count, max_samples)
+        out = np.empty(count, dtype=ring.dtype)
+        self._copy(start, count, out)
+
+        # the producer may have started overwriting the oldest samples during the copy
+        dropped = self._skip_overwritten(ring.reserved)
+        self.position = max(self.position, start + count)
+        return start + dropped, out[dropped:]
+
+    def read_into(self, target: np.ndarray) -> int:
+        """
+        Copy the unread samples into target at their absolute index (target[i] is sample i),
+        up to the end of target, and advance the cursor. Samples overwritten while copying
+        are zeroed in target. Returns the number of samples copied.
+        """
+        ring = self.ring
+        self._skip_overwritten(ring.reserved)
+        start = self.position
+        count = max(0, min(ring.head, len(target)) - start)
+        self._copy(start, count, target[start : start + count])
+
+        dropped = min(self._skip_overwritten(ring.reserved), count)
+        if dropped:
+            target[start : start + dropped] = 0
+        self.position = max(self.position, start + count)
+        return count - dropped
+
+    def close(self):
+        self.ring.remove_consumer(self)
+
+
+class RingBuffer:
+    """
+    Single-producer, multi-consumer ring of samples.
+
+    The producer either copies arrays in with write(), or lets the device write into the
+    buffer: reserve(n) returns the (offset, contiguous count) to fill at raw, and commit()
+    publishes the reserved samples. `head` is the number of samples published so far.
+    """
+
+    def __init__(self, capacity: int, ctype=c_double):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.capacity = int(capacity)
+        self.ctype = ctype
+        self.raw = (ctype * self.capacity)()  # what the device writes into
+        self.buffer = np.ctypeslib.as_array(self.raw)
+        self.dtype = self.buffer.dtype
+        self.itemsize = sizeof(ctype)
+        self.head = 0  # samples published
+        self.reserved = 0  # samples published or being written
+        self._consumers = []
+        self._lock = threading.Lock()  # guards the consumer list only
+
+    def __len__(self) -> int:
+        return min(self.head, self.capacity)
+
+    # ------------------------------------------------------------------ producer
+    def reserve(self, count: int):
+        """
+        Reserve the next count samples (count <= capacity) for writing in place.
+        Returns (offset, first): write the first `first` samples at buffer offset `offset`
+        and the remaining count - first at offset 0, then call commit().
+        """
+        if count > self.capacity:
+            raise ValueError(f"cannot reserve {count} samples in a ring of {self.capacity}")
+        offset = self.head % self.capacity
+        self.reserved = self.head + count
+        return offset, min(count, self.capacity - offset)
+
+    def commit(self):
+        self.head = self.reserved
+
+    def write(self, samples: np.ndarray):
+        """Copy samples in (only the last capacity samples are kept if there are more)."""
+        samples = np.asarray(samples)
+        if len(samples) > self.capacity:
+            self.head = self.reserved = self.head + len(samples) - self.capacity
+            samples = samples[-self.capacity :]
+        offset, first = self.reserve(len(samples))
+        self.buffer[offset : offset + first] = samples[:first]
+        self.buffer[: len(samples) - first] = samples[first:]
+        self.commit()
+
+    def skip(self, count: int):
+        """Advance over count samples that were never acquired (lost); they read as zero."""
+        while count > 0:
+            step = min(count, self.capacity)
+            offset, first = self.reserve(step)
+            self.buffer[offset : offset + first] = 0
+            self.buffer[: step - first] = 0
+            self.commit()
+            count -= step
+
+    def last(self):
+        """The most recent sample, or None if nothing has been written."""
+        return self.buffer[(self.head - 1) % self.capacity] if self.head else None
+
+    # ------------------------------------------------------------------ consumers
+    def add_consumer(self, name: str = None, from_start: bool = False) -> RingConsumer:
+        """
+        Register a consumer. It starts at the oldest sample still held when from_start is
+        set, otherwise at the next sample written.
+        """
+        position = max(0, self.head - self.capacity) if from_start else self.head
+        consumer = RingConsumer(self, name or f"consumer_{len(self._consumers)}", position)
+        with self._lock:
+            self._consumers.append(consumer)
+        return consumer
+
+    def remove_consumer(self, consumer: RingConsumer):
+        with self._lock:
+            if consumer in self._consumers:
+                self._consumers.remove(consumer)
+
+    @property
+    def consumers(self) -> list:
+        with self._lock:
+            return list(self._consumers)
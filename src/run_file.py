@@ -0,0 +1,166 @@
+# run_file.py
+# Native binary run format: the raw samples as a .npy array plus the JSON sidecar
+# (<name>_metadata.json) that already holds the serialized ExperimentConfig and
+# EventLogger. The sidecar gains a "run" block with the sample rate, the t_zero
+# sample index and the data file name. Loading memory-maps the .npy file, so
+# opening a run is O(1) and slicing a window only touches those pages.
+# Raw runs store int16 ADC counts; the sidecar holds the count to volt conversion
+# and windows are converted to volts only when they are read.
+# Streaming recordings append to the .npy file while acquiring (StreamingSampleWriter);
+# its header is rewritten in place at every sync, so the file is valid up to the last
+# sync even if the process dies.
+
+from dataclasses import dataclass, field
+import json
+import os
+import numpy as np
+from src.experiment_config import ExperimentConfig
+
+RUN_FORMAT_VERSION = 1
+RUN_SAMPLES_SUFFIX = ".npy"
+RUN_DATA_SUFFIXES = (".csv", RUN_SAMPLES_SUFFIX)
+METADATA_SUFFIX = "_metadata.json"
+
+
+def run_base_name(filename: str) -> str:
+    """Strip the data file suffix (.csv / .npy) or the metadata suffix from a run file name."""
+    for suffix in (METADATA_SUFFIX,) + RUN_DATA_SUFFIXES:
+        if filename.endswith(suffix):
+            return filename[: -len(suffix)]
+    return filename
+
+
+def metadata_filename_for(filename: str) -> str:
+    return run_base_name(filename) + METADATA_SUFFIX
+
+
+def samples_filename_for(filename: str) -> str:
+    return run_base_name(filename) + RUN_SAMPLES_SUFFIX
+
+
+def save_samples(filename: str, samples) -> str:
+    """Write the samples of a run as a .npy array next to filename, returns its path."""
+    path = samples_filename_for(filename)
+    np.save(path, np.asarray(samples))
+    return path
+
+
+class StreamingSampleWriter:
+    """
+    Append samples to a .npy file of growing length.
+
+    The header is written with a fixed size and holds the number of samples synced so
+    far: sync() flushes the data, updates the length in the header and fsyncs. A file
+    left behind by a crash loads as the samples of the last sync (np.load ignores the
+    unsynced tail).
+    """
+
+    HEADER_SIZE = 128  # magic + header, multiple of 64 as in the .npy 1.0 format
+
+    def __init__(self, filename: str, dtype):
+        self.filename = filename
+        self.dtype = np.dtype(dtype)
+        self.count = 0  # samples appended
+        self._file = open(filename, "wb")
+        self._write_header(0)
+
+    def _write_header(self, count: int):
+        header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+            np.lib.format.dtype_to_descr(self.dtype),
+            count,
+        )
+        magic = np.lib.format.magic(1, 0)
+        header = header.ljust(self.HEADER_SIZE - len(magic) - 2 - 1) + "\n"
+        self._file.seek(0)
+        self._file.write(magic + len(header).to_bytes(2, "little") + header.encode("latin1"))
+
+    def append(self, samples: np.ndarray):
+        if len(samples):
+            self._file.write(np.ascontiguousarray(samples, dtype=self.dtype).data)
+            self.count += len(samples)
+
+    def sync(self):
+        """Make the samples appended so far durable and visible in the header."""
+        self._file.flush()
+        os.fsync(self._file.fileno())  # data before the header that points at it
+        self._write_header(self.count)
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+@dataclass
+class RunData:
+    """A recorded run: memory-mapped samples plus the metadata from the JSON sidecar."""
+
+    samples: np.ndarray
+    hz_acq: float
+    t_zero_index: int = None
+    start_time_s: float = 0.0
+    metadata: dict = field(default_factory=dict)
+    adc_scale: float = None  # volts per count for raw int16 runs, None for float64 volts
+    adc_offset: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    @property
+    def config(self) -> ExperimentConfig:
+        return ExperimentConfig.from_dict(self.metadata)
+
+    @property
+    def is_raw(self) -> bool:
+        return self.adc_scale is not None
+
+    def to_volts(self, samples: np.ndarray) -> np.ndarray:
+        """Convert a slice of the samples to volts (a no-op for float64 runs)."""
+        if not self.is_raw:
+            return samples
+        return samples * self.adc_scale + self.adc_offset
+
+    def index_at(self, time_s: float) -> int:
+        """Sample index for a time on the saved time axis, clamped to the run."""
+        index = int(round((time_s - self.start_time_s) * self.hz_acq))
+        return min(max(index, 0), len(self.samples))
+
+    def time_axis(self, start: int = 0, stop: int = None) -> np.ndarray:
+        stop = len(self.samples) if stop is None else stop
+        return self.start_time_s + np.arange(start, stop) / self.hz_acq
+
+    def window(self, start_s: float = None, stop_s: float = None, step: int = 1):
+        """
+        Return (times, volts) between two times on the saved time axis; step decimates the window.
+        For float64 runs the samples are a view into the memory map, raw runs convert
+        just the selected samples.
+        """
+        start = 0 if start_s is None else self.index_at(start_s)
+        stop = len(self.samples) if stop_s is None else self.index_at(stop_s)
+        return self.time_axis(start, stop)[::step], self.to_volts(self.samples[start:stop:step])
+
+
+def load_run(filename: str, mmap_mode: str = "r") -> RunData:
+    """
+    Open a binary run from its .npy file, its metadata file or its base name.
+    The samples are memory-mapped (mmap_mode=None reads them into memory instead).
+    """
+    with open(metadata_filename_for(filename), "r") as f:
+        metadata = json.load(f)
+
+    run = metadata.get("run", {})
+    samples_path = os.path.join(
+        os.path.dirname(filename), run.get("samples_file", os.path.basename(samples_filename_for(filename)))
+    )
+    return RunData(
+        samples=np.load(samples_path, mmap_mode=mmap_mode),
+        hz_acq=float(run.get("hz_acq", metadata.get("recording_hz"))),
+        t_zero_index=run.get("t_zero_index"),
+        start_time_s=float(run.get("start_time_s", 0.0)),
+        metadata=metadata,
+        adc_scale=run.get("adc_scale"),
+        adc_offset=float(run.get("adc_offset", 0.0)),
+    )
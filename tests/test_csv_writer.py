@@ -0,0 +1,67 @@
+# tests/test_csv_writer.py
+import csv
+import numpy as np
+import pandas as pd
+import pytest
+from src.csv_writer import format_rows, time_precision_for, write_signal_csv
+
+
+def test_format_rows_fixed_point():
+    values = np.array([0.0, -0.0, 1.5, -1.25, 123.456789, -0.0000001, 9.9999999])
+    text = format_rows((values,), (3,)).tobytes().decode()
+    assert text.splitlines() == ["0.000", "0.000", "1.500", "-1.250", "123.457", "0.000", "10.000"]
+
+
+def test_format_rows_special_values():
+    values = np.array([np.nan, np.inf, -np.inf, 1e300, 0.25])
+    text = format_rows((values, values), (2, 2)).tobytes().decode()
+    assert text.splitlines() == ["nan,nan", "inf,inf", "-inf,-inf", "1e+300,1e+300", "0.25,0.25"]
+
+
+def test_format_rows_rejects_bad_precision():
+    with pytest.raises(ValueError):
+        format_rows((np.zeros(3),), (10,))
+
+
+@pytest.mark.parametrize(
+    "hz, start, expected",
+    [(1_000_000, 0.0, 6), (100_000, 0.5, 5), (1000, 0.0, 3), (3000, 0.0, 9), (1000, 0.0056412, 7), (1000, 3.14159265358979, 9)],
+)
+def test_time_precision_for(hz, start, expected):
+    assert time_precision_for(hz, start) == expected
+
+
+def test_write_signal_csv_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0.0, 0.5, 10_000)
+    filename = tmp_path / "run.csv"
+
+    # small chunks so the chunk boundaries are exercised
+    write_signal_csv(str(filename), samples, hz_acq=100_000, start_time=0.25, chunk_rows=999)
+
+    data = pd.read_csv(filename)
+    assert list(data.columns) == ["time", "signal"]
+    assert len(data) == len(samples)
+    np.testing.assert_allclose(data["signal"], samples, atol=5e-7)
+    np.testing.assert_allclose(data["time"], 0.25 + np.arange(len(samples)) / 100_000, atol=1e-12)
+
+
+def test_write_signal_csv_readable_by_dict_reader(tmp_path):
+    filename = tmp_path / "run.csv"
+    write_signal_csv(str(filename), np.array([0.1, -0.2, np.nan]), hz_acq=1000, signal_precision=3)
+
+    # same parsing as the /load_csv route
+    with open(filename, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [float(r["time"]) for r in rows] == [0.0, 0.001, 0.002]
+    assert [float(r["signal"]) for r in rows][:2] == [0.1, -0.2]
+    assert np.isnan(float(rows[2]["signal"]))
+
+
+def test_write_signal_csv_converts_raw_counts(tmp_path):
+    counts = np.array([-32768, -1, 0, 1, 32767], dtype=np.int16)
+    filename = tmp_path / "run.csv"
+    write_signal_csv(str(filename), counts, hz_acq=1000, scale=2 / 65536, offset=0.5, chunk_rows=2)
+
+    data = pd.read_csv(filename)
+    np.testing.assert_allclose(data["signal"], counts * (2 / 65536) + 0.5, atol=5e-7)
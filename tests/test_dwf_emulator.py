@@ -0,0 +1,181 @@
+# tests/test_dwf_emulator.py
+import threading
+import numpy as np
+import pytest
+from src.io_controller import IOController
+from src.recorder import Recorder
+from src.event_logger import EventLogger
+from src.dwf_emulator import DwfEmulator
+from src.timed_action import TimedAction
+from src.utils import precise_sleep
+from src.constants import ANALOG_IN_CHANNEL, PIN_GATE, PIN_TRIGGER, DWF_BACKEND_ENV_VAR
+
+
+def record(io, n_samples, hz_acq=10000):
+    logger = EventLogger()
+    logger.start_event("test")
+    recorder = Recorder(io)
+    recorder.prepare_recording(
+        logger=logger, channel=ANALOG_IN_CHANNEL, n_samples=n_samples, hz_acq=hz_acq, channel_range=2
+    )
+    return recorder.complete_recording(actions=None)
+
+
+def test_open_device_selects_emulator():
+    io = IOController(backend="emulator")
+    io.open_device()
+    assert isinstance(io.dwf, DwfEmulator)
+    assert io.hdwf.value != 0
+    io.close_device()
+    assert io.hdwf is None
+
+
+def test_backend_from_environment(monkeypatch):
+    monkeypatch.setenv(DWF_BACKEND_ENV_VAR, "emulator")
+    io = IOController()
+    io.open_device()
+    assert isinstance(io.dwf, DwfEmulator)
+    io.close_device()
+
+
+def test_shutter_pins_reach_emulator():
+    io = IOController(backend="emulator")
+    io.open_device()
+    io.toggle_shutter(True)
+    assert io.dwf.pin_state & (1 << PIN_GATE)
+    assert not io.dwf.pin_state & (1 << PIN_TRIGGER)
+    io.close_device()
+
+
+def test_records_requested_samples_in_real_time():
+    io = IOController(backend="emulator")
+    io.open_device()
+    samples, n, lost, corrupted, _ = record(io, n_samples=2000, hz_acq=10000)
+    assert n == 2000
+    assert len(samples) == 2000
+    assert isinstance(samples, np.ndarray) and samples.dtype == np.float64
+    assert samples.base is not None  # a view over the acquisition buffer, not a copy
+    assert not lost and not corrupted
+    io.close_device()
+
+
+def test_injected_faults_are_reported():
+    emulator = DwfEmulator(seed=1)
+    emulator.inject_lost_samples(start=500, count=100)
+    emulator.inject_corrupted_samples(start=1200, count=10)
+    io = IOController(backend=emulator)
+    io.open_device()
+    _, n, lost, corrupted, _ = record(io, n_samples=2000, hz_acq=10000)
+    assert n >= 2000
+    assert lost == 1
+    assert corrupted == 1
+    io.close_device()
+
+
+def test_fifo_overrun_after_stall_reports_lost_samples():
+    emulator = DwfEmulator(fifo_samples=256)
+    emulator.inject_stall(at_s=0.01, duration_s=0.1)
+    io = IOController(backend=emulator)
+    io.open_device()
+    _, _, lost, _, _ = record(io, n_samples=3000, hz_acq=10000)
+    assert lost == 1
+    io.close_device()
+
+
+@pytest.mark.parametrize("threaded, expect_lost", [(True, 0), (False, 1)])
+def test_blocking_action_does_not_stall_threaded_drain(threaded, expect_lost):
+    # the FIFO holds 25.6 ms of samples, the action blocks for 60 ms
+    io = IOController(backend=DwfEmulator(fifo_samples=256))
+    io.open_device()
+    logger = EventLogger()
+    logger.start_event("test")
+    stop_flag = {"stop": False}
+    actions = [
+        TimedAction(0.0, lambda: None, "ared_on"),
+        TimedAction(0.02, lambda: precise_sleep(0.06), "blocking"),
+        TimedAction(0.15, lambda: stop_flag.update(stop=True), "end_recording"),
+    ]
+    recorder = Recorder(io)
+    recorder.prepare_recording(
+        logger=logger, channel=ANALOG_IN_CHANNEL, n_samples=10000, hz_acq=10000, channel_range=2
+    )
+    _, n, lost, _, _ = recorder.complete_recording(actions=actions, stop_flag=stop_flag, threaded=threaded)
+
+    assert lost == expect_lost
+    assert all(a._executed for a in actions)
+    assert recorder.data_index[0] is not None and recorder.data_index[1] is not None
+    io.close_device()
+
+
+def test_raw_recording_returns_int16_counts():
+    emulator = DwfEmulator(signal_fn=lambda t, red, green, rng: np.full(t.shape, 0.3))
+    io = IOController(backend=emulator)
+    io.open_device()
+    logger = EventLogger()
+    logger.start_event("test")
+    recorder = Recorder(io)
+    recorder.prepare_recording(
+        logger=logger, channel=ANALOG_IN_CHANNEL, n_samples=1000, hz_acq=10000, channel_range=2, raw=True
+    )
+    samples, n, _, _, _ = recorder.complete_recording(actions=None)
+
+    assert samples.dtype == np.int16 and samples.nbytes == 2 * n
+    assert recorder.adc_scale == pytest.approx(2 / 65536)
+    np.testing.assert_allclose(recorder.to_volts(samples), 0.3, atol=recorder.adc_scale)
+    assert recorder.get_run_info()["sample_format"] == "int16"
+    io.close_device()
+
+
+def test_live_consumer_sees_samples_during_recording():
+    io = IOController(backend="emulator")
+    io.open_device()
+    logger = EventLogger()
+    logger.start_event("test")
+    recorder = Recorder(io)
+    recorder.prepare_recording(
+        logger=logger, channel=ANALOG_IN_CHANNEL, n_samples=3000, hz_acq=10000, channel_range=2
+    )
+    consumer = recorder.add_consumer("live")
+    received = np.zeros(3000)
+    reads = []
+    done = threading.Event()
+
+    def live_reader():
+        while not done.is_set():
+            reads.append(consumer.read_into(received))
+            done.wait(0.01)
+
+    reader = threading.Thread(target=live_reader)
+    reader.start()
+    samples, n, _, _, _ = recorder.complete_recording(actions=None)
+    done.set()
+    reader.join()
+    consumer.read_into(received)
+
+    assert sum(1 for r in reads if r) > 5  # data arrived while recording, not only at the end
+    np.testing.assert_array_equal(received[:n], samples)
+    assert consumer.overruns == 0
+    io.close_device()
+
+
+def test_streaming_recording_keeps_only_the_ring_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.recorder.RECORDER_RING_MIN_SAMPLES", 4096)
+    monkeypatch.setattr("src.recorder.RECORDER_RING_SECONDS", 0.0)
+    monkeypatch.setattr("src.recorder.STREAM_FSYNC_INTERVAL_S", 0.05)
+    filename = str(tmp_path / "stream.npy")
+    io = IOController(backend="emulator")
+    io.open_device()
+    logger = EventLogger()
+    logger.start_event("test")
+    recorder = Recorder(io)
+    recorder.prepare_recording(
+        logger=logger, channel=ANALOG_IN_CHANNEL, n_samples=30000, hz_acq=50000, channel_range=2
+    )
+    samples, n, lost, _, _ = recorder.complete_recording(actions=None, stream_to=filename)
+
+    assert recorder.ring.capacity == 4096
+    assert n == 30000 and not lost
+    assert isinstance(samples, np.memmap)
+    np.testing.assert_array_equal(np.load(filename), samples)
+    assert np.all(samples != 0)
+    io.close_device()
@@ -70,3 +70,10 @@ def test_clone_with_preserves_custom_event_logger_if_provided():
 
     assert cfg2.event_logger is shared_logger
     assert len(cfg2.event_logger.get_events()) == 2  # start_event + log_event
+
+
+def test_phase_durations_clamped_unless_streaming():
+    assert ExperimentConfig.from_dict({"agreen_duration_s": 600}).agreen_duration_s == 10.0
+    cfg = ExperimentConfig.from_dict({"agreen_duration_s": 600, "stream_to_disk": True})
+    assert cfg.agreen_duration_s == 600
+    assert cfg.to_dict()["stream_to_disk"] is True
@@ -12,6 +12,7 @@ def test_run_protocol_calls_all_steps(tmp_path):
     recorder.prepare_recording.return_value = None
     recorder.wait_for_data_start.return_value = 0.0
     recorder.complete_recording.return_value = ([0.0] * 1000, 1000, 0, 0, [])
+    recorder.get_run_info.return_value = {"hz_acq": 1000, "n_samples": 1000, "t_zero_index": 0}
 
     cfg = ExperimentConfig(
         actinic_led_intensity=75,
@@ -37,6 +38,7 @@ def test_event_logger_logs_events():
     recorder.prepare_recording.return_value = None
     recorder.wait_for_data_start.return_value = 0.0
     recorder.complete_recording.return_value = ([0.0] * 1000, 1000, 0, 0, [])
+    recorder.get_run_info.return_value = {"hz_acq": 1000, "n_samples": 1000, "t_zero_index": 0}
 
     cfg = ExperimentConfig(
         actinic_led_intensity=50,
@@ -0,0 +1,71 @@
+# tests/test_ring_buffer.py
+from ctypes import c_short
+import numpy as np
+import pytest
+from src.ring_buffer import RingBuffer
+
+
+def test_write_and_read_across_the_wrap():
+    ring = RingBuffer(8)
+    consumer = ring.add_consumer("reader")
+    ring.write(np.arange(6.0))
+    assert consumer.read(4)[0] == 0
+    ring.write(np.arange(6.0, 10.0))  # wraps around the end of the buffer
+
+    start, samples = consumer.read()
+    assert start == 4
+    np.testing.assert_array_equal(samples, [4, 5, 6, 7, 8, 9])
+    assert consumer.available() == 0
+
+
+def test_consumers_read_independently():
+    ring = RingBuffer(16)
+    fast = ring.add_consumer("fast")
+    ring.write(np.arange(5.0))
+    slow = ring.add_consumer("slow", from_start=True)
+    late = ring.add_consumer("late")
+
+    np.testing.assert_array_equal(fast.read()[1], np.arange(5.0))
+    ring.write(np.arange(5.0, 8.0))
+    np.testing.assert_array_equal(fast.read()[1], [5, 6, 7])
+    np.testing.assert_array_equal(slow.read()[1], np.arange(8.0))
+    assert late.read()[0] == 5
+    assert len(ring.consumers) == 3
+    late.close()
+    assert [c.name for c in ring.consumers] == ["fast", "slow"]
+
+
+def test_slow_consumer_loses_oldest_samples():
+    ring = RingBuffer(4)
+    consumer = ring.add_consumer()
+    ring.write(np.arange(10.0))
+
+    start, samples = consumer.read()
+    assert start == 6
+    np.testing.assert_array_equal(samples, [6, 7, 8, 9])
+    assert consumer.overruns == 6
+
+
+def test_reserve_commit_and_skip():
+    ring = RingBuffer(5, c_short)
+    consumer = ring.add_consumer()
+    ring.write(np.array([1, 2, 3], dtype=np.int16))
+
+    offset, first = ring.reserve(4)
+    assert (offset, first) == (3, 2)
+    ring.buffer[3:5] = [4, 5]
+    ring.buffer[:2] = [6, 7]
+    assert consumer.available() == 3  # not published before commit
+    ring.commit()
+    ring.skip(2)
+
+    target = np.full(12, -1, dtype=np.int16)
+    assert consumer.read_into(target) == 5
+    np.testing.assert_array_equal(target[:9], [-1, -1, -1, -1, 5, 6, 7, 0, 0])
+    assert consumer.overruns == 4
+    assert ring.last() == 0
+
+
+def test_reserve_larger_than_capacity_rejected():
+    with pytest.raises(ValueError):
+        RingBuffer(4).reserve(5)
@@ -0,0 +1,136 @@
+# tests/test_run_file.py
+import json
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+from src.experiment_config import ExperimentConfig
+from src.protocol_runner import ProtocolRunner
+from src.run_file import (
+    StreamingSampleWriter,
+    load_run,
+    metadata_filename_for,
+    run_base_name,
+    samples_filename_for,
+)
+
+
+def make_runner(samples, hz_acq, t_zero_index):
+    recorder = MagicMock()
+    recorder.complete_recording.return_value = (samples, len(samples), 0, 0, [])
+    recorder.get_run_info.return_value = {
+        "hz_acq": hz_acq,
+        "n_samples": len(samples),
+        "t_zero_index": t_zero_index,
+    }
+    return ProtocolRunner(MagicMock(), recorder), recorder
+
+
+def make_config(tmp_path, save_format):
+    return ExperimentConfig(
+        recording_hz=1000,
+        ared_duration_s=0.001,
+        wait_after_ared_s=0.001,
+        agreen_delay_s=0.001,
+        agreen_duration_s=0.005,
+        filename=str(tmp_path / "run.csv"),
+        save_format=save_format,
+    )
+
+
+def test_run_file_names():
+    assert run_base_name("data/run_1.csv") == "data/run_1"
+    assert run_base_name("data/run_1.npy") == "data/run_1"
+    assert run_base_name("data/run_1_metadata.json") == "data/run_1"
+    assert metadata_filename_for("run_1.npy") == "run_1_metadata.json"
+    assert samples_filename_for("run_1.csv") == "run_1.npy"
+
+
+def test_npy_run_is_memory_mapped(tmp_path):
+    samples = np.linspace(0.0, 1.0, 5000)
+    runner, recorder = make_runner(samples, 1000.0, 120)
+    cfg = make_config(tmp_path, "npy")
+
+    runner.run_protocol(cfg)
+
+    recorder.save_data.assert_not_called()
+    run = load_run(str(tmp_path / "run.npy"))
+    assert isinstance(run.samples, np.memmap)
+    assert len(run) == 5000
+    assert run.hz_acq == 1000.0
+    assert run.t_zero_index == 120
+    assert run.config.save_format == "npy"
+    assert [label for _, label in run.config.event_logger.get_events()][0] == "protocol_start"
+
+    times, window = run.window(1.0, 2.0)
+    assert len(window) == 1000
+    assert times[0] == pytest.approx(1.0)
+    np.testing.assert_array_equal(window, samples[1000:2000])
+
+
+def test_both_formats_share_the_metadata_file(tmp_path):
+    runner, recorder = make_runner(np.zeros(100), 1000.0, 0)
+    cfg = make_config(tmp_path, "both")
+
+    runner.run_protocol(cfg)
+
+    recorder.save_data.assert_called_once()
+    assert (tmp_path / "run.npy").exists()
+    with open(tmp_path / "run_metadata.json") as f:
+        metadata = json.load(f)
+    assert metadata["run"]["samples_file"] == "run.npy"
+    assert metadata["run"]["format_version"] == 1
+
+
+def test_invalid_save_format_rejected():
+    with pytest.raises(ValueError):
+        ExperimentConfig.from_dict({"save_format": "hdf5"})
+
+
+def test_raw_run_is_converted_on_read(tmp_path):
+    counts = np.arange(-500, 500, dtype=np.int16)
+    runner, recorder = make_runner(counts, 1000.0, 0)
+    recorder.get_run_info.return_value.update(sample_format="int16", adc_scale=2 / 65536, adc_offset=0.1)
+    cfg = make_config(tmp_path, "npy")
+
+    runner.run_protocol(cfg)
+
+    run = load_run(str(tmp_path / "run.npy"))
+    assert run.is_raw and run.samples.dtype == np.int16
+    assert (tmp_path / "run.npy").stat().st_size < counts.size * 2 + 256
+    _, volts = run.window(0.1, 0.2)
+    np.testing.assert_allclose(volts, counts[100:200] * (2 / 65536) + 0.1)
+
+
+def test_streaming_writer_file_is_valid_after_a_crash(tmp_path):
+    filename = str(tmp_path / "stream.npy")
+    writer = StreamingSampleWriter(filename, np.int16)
+    writer.append(np.arange(100, dtype=np.int16))
+    writer.sync()
+    writer.append(np.arange(50, dtype=np.int16))  # not synced yet
+
+    # the process dies here: the file holds the synced samples
+    crashed = np.load(filename, mmap_mode="r")
+    np.testing.assert_array_equal(crashed, np.arange(100))
+
+    writer.close()
+    np.testing.assert_array_equal(np.load(filename)[100:], np.arange(50))
+    assert writer.count == 150
+
+
+def test_streamed_protocol_run_loads(tmp_path):
+    from src.dwf_emulator import DwfEmulator
+    from src.io_controller import IOController
+    from src.recorder import Recorder
+
+    io = IOController(backend=DwfEmulator())
+    io.open_device()
+    runner = ProtocolRunner(io, Recorder(io))
+    cfg = make_config(tmp_path, "npy")
+    cfg.stream_to_disk = True
+
+    runner.run_protocol(cfg)
+
+    run = load_run(str(tmp_path / "run.npy"))
+    assert run.metadata["run"]["complete"] is True
+    assert len(run) == run.metadata["run"]["n_samples"] > 0
+    assert run.t_zero_index is not None